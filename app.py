@@ -1,8 +1,9 @@
 import gradio as gr
 import os
 from dotenv import load_dotenv
-from config import UserProfile
+from config import UserProfile, Priority
 from orchestrator import FinancialAdvisorOrchestrator
+from src.agents.http_client import warm_up
 
 load_dotenv()
 
@@ -10,7 +11,8 @@ def create_gradio_interface():
     """Create the Gradio interface"""
     
     def analyze_finances(monthly_income, monthly_expenses, debt_amount, debt_rate, 
-                        savings, investment_exp, risk_tolerance, age, goals, api_key):
+                        savings, investment_exp, risk_tolerance, age, goals, api_key,
+                        request: gr.Request):
         """Main analysis function"""
         try:
             profile = UserProfile(
@@ -26,7 +28,9 @@ def create_gradio_interface():
             )
             
             orchestrator = FinancialAdvisorOrchestrator(api_key=api_key)
-            report = orchestrator.analyze(profile)
+            # One tenant per browser session, so each user gets their own cap and fair share
+            tenant = f"gradio-{request.session_hash}" if request else "gradio"
+            report = orchestrator.analyze(profile, tenant=tenant, priority=Priority.INTERACTIVE)
             return report
             
         except Exception as e:
@@ -103,5 +107,7 @@ def create_gradio_interface():
     return demo
 
 if __name__ == "__main__":
+    # Opens ADVISOR_HTTP_WARM_UP pooled connections to the LLM endpoint (no-op by default)
+    warm_up()
     app = create_gradio_interface()
     app.launch(share=True)
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Compare token usage and latency of the per-agent and combined LLM call paths.
+
+    python benchmark.py --runs 3     # live calls, needs OPENAI_API_KEY
+    python benchmark.py --dry-run    # prompt token counts only, no API calls
+
+Token counting uses tiktoken, which downloads its encoding file on first use
+unless it is already cached.
+"""
+import argparse
+import os
+import statistics
+import time
+from dotenv import load_dotenv
+from langchain.callbacks import get_openai_callback
+from config import UserProfile, ProfilingConfig
+from orchestrator import FinancialAdvisorOrchestrator
+
+load_dotenv()
+
+SAMPLE_PROFILE = UserProfile(
+    monthly_income=5000,
+    monthly_expenses=3500,
+    debt_amount=15000,
+    debt_interest_rate=18.5,
+    savings=10000,
+    investment_experience="beginner",
+    risk_tolerance="moderate",
+    age=30,
+    financial_goals="Save for house down payment and retirement"
+)
+
+
+def prompt_tokens(api_key: str, profile: UserProfile) -> None:
+    """Print prompt token counts for both paths without calling the API.
+
+    The combined prompt drops the per-agent schema instructions as well as
+    merging the calls, so the separate path is also counted without them to
+    show how much of the saving comes from each change.
+    """
+    orchestrator = FinancialAdvisorOrchestrator(api_key, profiling=ProfilingConfig())
+    combined = orchestrator.combined_agent
+    agent_types = combined.llm_agent_types(profile)
+
+    def separate_tokens(include_format_instructions: bool) -> int:
+        total = 0
+        for agent_type in agent_types:
+            agent = orchestrator.agents[agent_type]
+            messages = agent.format_messages(agent.build_user_input(profile), include_format_instructions)
+            total += agent.llm.get_num_tokens_from_messages(messages)
+        return total
+
+    separate = separate_tokens(include_format_instructions=True)
+    separate_no_schema = separate_tokens(include_format_instructions=False)
+    single = combined.llm.get_num_tokens_from_messages(combined.format_messages(profile, agent_types))
+
+    print(f"{'path':<20} {'calls':>5} {'prompt tokens':>14}")
+    print(f"{'separate':<20} {len(agent_types):>5} {separate:>14}")
+    print(f"{'separate, no schema':<20} {len(agent_types):>5} {separate_no_schema:>14}")
+    print(f"{'combined':<20} {1:>5} {single:>14}")
+    print()
+    print(f"saved by dropping schema instructions: {separate - separate_no_schema}")
+    print(f"saved by merging the calls:            {separate_no_schema - single}")
+
+
+def run(api_key: str, profile: UserProfile, combined: bool, runs: int) -> dict:
+    orchestrator = FinancialAdvisorOrchestrator(api_key, profiling=ProfilingConfig(), combined=combined)
+    latencies, prompt, completion = [], 0, 0
+
+    for _ in range(runs):
+        with get_openai_callback() as cb:
+            started = time.perf_counter()
+            orchestrator.analyze(profile)
+            latencies.append(time.perf_counter() - started)
+        prompt += cb.prompt_tokens
+        completion += cb.completion_tokens
+
+    return {
+        "mean_latency": statistics.mean(latencies),
+        "max_latency": max(latencies),
+        "prompt_tokens": prompt / runs,
+        "completion_tokens": completion / runs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Requests per path")
+    parser.add_argument("--dry-run", action="store_true", help="Only count prompt tokens")
+    args = parser.parse_args()
+
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if args.dry_run:
+        prompt_tokens(api_key or "dry-run", SAMPLE_PROFILE)
+        return
+    if not api_key:
+        parser.error("OPENAI_API_KEY is required for live runs (use --dry-run otherwise)")
+
+    print(f"{'path':<10} {'mean s':>8} {'max s':>8} {'prompt tok':>11} {'completion tok':>15}")
+    for name, combined in (("separate", False), ("combined", True)):
+        result = run(api_key, SAMPLE_PROFILE, combined, args.runs)
+        print(f"{name:<10} {result['mean_latency']:>8.2f} {result['max_latency']:>8.2f} "
+              f"{result['prompt_tokens']:>11.0f} {result['completion_tokens']:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
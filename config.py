@@ -1,3 +1,5 @@
+import json
+import os
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from enum import Enum
@@ -7,6 +9,11 @@ class AgentType(str, Enum):
     INVESTMENT = "investment"
     DEBT_MANAGEMENT = "debt_management"
 
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    API = "api"
+    BATCH = "batch"
+
 class UserProfile(BaseModel):
     monthly_income: float = Field(..., gt=0, description="Monthly income in dollars")
     monthly_expenses: float = Field(..., ge=0, description="Current monthly expenses")
@@ -24,3 +31,100 @@ class AgentResponse(BaseModel):
     analysis: str
     key_metrics: Dict[str, Any]
     action_items: List[str]
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+class ProfilingConfig(BaseModel):
+    enabled: bool = Field(default=False, description="Profile every request")
+    sample_rate: float = Field(default=0.0, ge=0, le=1, description="Fraction of requests to profile when not always enabled")
+    cpu: bool = Field(default=True, description="Collect cProfile timings")
+    memory: bool = Field(default=False, description="Collect tracemalloc allocation deltas")
+    output_dir: str = Field(default="profiles", description="Directory for pstats and flamegraph artifacts")
+
+    @classmethod
+    def from_env(cls) -> "ProfilingConfig":
+        """Build profiling settings from ADVISOR_PROFILE* environment variables"""
+        return cls(
+            enabled=env_flag("ADVISOR_PROFILE"),
+            sample_rate=float(os.getenv("ADVISOR_PROFILE_SAMPLE_RATE", "0")),
+            cpu=env_flag("ADVISOR_PROFILE_CPU", default=True),
+            memory=env_flag("ADVISOR_PROFILE_MEMORY"),
+            output_dir=os.getenv("ADVISOR_PROFILE_DIR", "profiles")
+        )
+
+class HttpClientConfig(BaseModel):
+    base_url: Optional[str] = Field(default=None, description="OpenAI-compatible endpoint, e.g. a local stub for testing")
+    max_connections: int = Field(default=100, gt=0, description="Maximum open connections in the pool")
+    max_keepalive_connections: int = Field(default=20, ge=0, description="Idle connections kept alive for reuse")
+    keepalive_expiry: float = Field(default=30.0, ge=0, description="Seconds an idle connection is kept alive")
+    connect_timeout: float = Field(default=5.0, gt=0, description="Seconds to establish a connection")
+    read_timeout: float = Field(default=120.0, gt=0, description="Seconds to wait for response data")
+    pool_timeout: float = Field(default=10.0, gt=0, description="Seconds to wait for a free pooled connection")
+    http2: bool = Field(default=True, description="Use HTTP/2 when the h2 package is installed")
+    warm_up_connections: int = Field(default=0, ge=0, description="Connections to open at startup (0 disables warm-up)")
+
+    @classmethod
+    def from_env(cls) -> "HttpClientConfig":
+        """Build HTTP client settings from OPENAI_BASE_URL and ADVISOR_HTTP_* environment variables"""
+        return cls(
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            max_connections=int(os.getenv("ADVISOR_HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("ADVISOR_HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("ADVISOR_HTTP_KEEPALIVE_EXPIRY", "30")),
+            connect_timeout=float(os.getenv("ADVISOR_HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("ADVISOR_HTTP_READ_TIMEOUT", "120")),
+            pool_timeout=float(os.getenv("ADVISOR_HTTP_POOL_TIMEOUT", "10")),
+            http2=env_flag("ADVISOR_HTTP2", default=True),
+            warm_up_connections=int(os.getenv("ADVISOR_HTTP_WARM_UP", "0"))
+        )
+
+class SchedulerConfig(BaseModel):
+    max_concurrency: int = Field(default=6, gt=0, description="Agent LLM calls running at once across all tenants")
+    tenant_max_concurrency: int = Field(default=3, gt=0, description="Default per-tenant concurrency cap")
+    tenant_limits: Dict[str, int] = Field(default_factory=dict, description="Per-tenant concurrency cap overrides")
+    tenant_weights: Dict[str, float] = Field(default_factory=dict, description="Fair-share weight per tenant (default 1.0)")
+    class_limits: Dict[Priority, int] = Field(
+        default_factory=lambda: {Priority.BATCH: 4},
+        description="Per-class concurrency cap; by default batch leaves 2 of the 6 slots to interactive and API calls"
+    )
+    slo_seconds: Dict[Priority, float] = Field(
+        default_factory=lambda: {Priority.INTERACTIVE: 1.0, Priority.API: 5.0, Priority.BATCH: 300.0},
+        description="Queue-time SLO per priority class"
+    )
+    history_size: int = Field(default=1000, gt=0, description="Queue-time samples kept per priority class and tenant")
+    tenant_history_limit: int = Field(default=256, gt=0, description="Tenants whose queue-time samples are kept for reporting")
+
+    @classmethod
+    def from_env(cls) -> "SchedulerConfig":
+        """Build scheduler settings from ADVISOR_SCHEDULER_* environment variables.
+
+        Tenant limits, tenant weights, class limits and SLOs are JSON objects,
+        e.g. ADVISOR_SCHEDULER_TENANT_LIMITS='{"acme": 4}' and
+        ADVISOR_SCHEDULER_SLO_SECONDS='{"interactive": 0.5}'.
+        """
+        values = {
+            "max_concurrency": int(os.getenv("ADVISOR_SCHEDULER_MAX_CONCURRENCY", "6")),
+            "tenant_max_concurrency": int(os.getenv("ADVISOR_SCHEDULER_TENANT_MAX_CONCURRENCY", "3"))
+        }
+        if os.getenv("ADVISOR_SCHEDULER_TENANT_LIMITS"):
+            values["tenant_limits"] = json.loads(os.environ["ADVISOR_SCHEDULER_TENANT_LIMITS"])
+        if os.getenv("ADVISOR_SCHEDULER_TENANT_WEIGHTS"):
+            values["tenant_weights"] = json.loads(os.environ["ADVISOR_SCHEDULER_TENANT_WEIGHTS"])
+        if os.getenv("ADVISOR_SCHEDULER_CLASS_LIMITS"):
+            # Classes missing from the variable keep their default cap
+            values["class_limits"] = {
+                **cls().class_limits,
+                **{Priority(k): v for k, v in json.loads(os.environ["ADVISOR_SCHEDULER_CLASS_LIMITS"]).items()}
+            }
+        if os.getenv("ADVISOR_SCHEDULER_SLO_SECONDS"):
+            # Classes missing from the variable keep their default SLO
+            values["slo_seconds"] = {
+                **cls().slo_seconds,
+                **{Priority(k): v for k, v in json.loads(os.environ["ADVISOR_SCHEDULER_SLO_SECONDS"]).items()}
+            }
+        return cls(**values)
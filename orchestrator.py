@@ -1,13 +1,32 @@
-from typing import Dict, List, TypedDict, Annotated, Optional
+from typing import Dict, List, TypedDict, Annotated, Optional, Union
 from src.agents.factory import AgentFactory
-from config import UserProfile, AgentResponse, AgentType
+from src.agents.combined import CombinedAnalysisAgent
+from config import UserProfile, AgentResponse, AgentType, Priority, ProfilingConfig, env_flag
+from profiling import RequestProfiler, profile_phase, should_profile
+from scheduler import FairScheduler, get_scheduler
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import functools
+import logging
 import operator
 
 from typing import Dict, List, TypedDict, Annotated, Sequence
 from langgraph.graph import StateGraph, END
 import operator
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# agent type -> (graph node / completion name, state key, error label)
+AGENT_NODES = {
+    AgentType.BUDGETING: ("budgeting", "budgeting_response", "Budgeting"),
+    AgentType.INVESTMENT: ("investment", "investment_response", "Investment"),
+    AgentType.DEBT_MANAGEMENT: ("debt_management", "debt_response", "Debt management")
+}
+
 class OrchestratorState(TypedDict):
     user_profile: UserProfile
     budgeting_response: Optional[AgentResponse]
@@ -16,23 +35,47 @@ class OrchestratorState(TypedDict):
     final_report: Optional[str]
     errors: Annotated[List[str], operator.add]
     agents_completed: Annotated[List[str], operator.add]
+    profiler: Optional[RequestProfiler]
+    tenant: str
+    priority: Priority
 
 class FinancialAdvisorOrchestrator:
     """LangGraph-based orchestrator for coordinating multiple financial agents"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, profiling: Optional[ProfilingConfig] = None,
+                 combined: Optional[bool] = None, scheduler: Optional[FairScheduler] = None):
         self.api_key = api_key
+        self.scheduler = scheduler or get_scheduler()
+        self.profiling = profiling or ProfilingConfig.from_env()
+        self.last_profile: Optional[Dict] = None
+        self.combined = env_flag("ADVISOR_COMBINED_LLM") if combined is None else combined
         self.agents = AgentFactory.create_all_agents(api_key)
-        self.graph = self._build_graph()
+        self.combined_agent = CombinedAnalysisAgent(self.agents)
+        self.graph = self._build_combined_graph() if self.combined else self._build_graph()
+    
+    def _build_combined_graph(self) -> StateGraph:
+        """Build the single-LLM-call workflow: one combined node, then synthesis"""
+        workflow = StateGraph(OrchestratorState)
+        
+        workflow.add_node("combined", RunnableLambda(
+            self._run_combined_agents, afunc=self._arun_combined_agents
+        ))
+        workflow.add_node("synthesize", self._synthesize_recommendations)
+        
+        workflow.set_entry_point("combined")
+        workflow.add_edge("combined", "synthesize")
+        workflow.add_edge("synthesize", END)
+        
+        return workflow.compile()
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow - sequential execution to avoid state conflicts"""
         workflow = StateGraph(OrchestratorState)
         
         # Add nodes
-        workflow.add_node("budgeting", self._run_budgeting_agent)
-        workflow.add_node("investment", self._run_investment_agent)
-        workflow.add_node("debt_management", self._run_debt_management_agent)
+        workflow.add_node("budgeting", self._agent_node(AgentType.BUDGETING))
+        workflow.add_node("investment", self._agent_node(AgentType.INVESTMENT))
+        workflow.add_node("debt_management", self._agent_node(AgentType.DEBT_MANAGEMENT))
         workflow.add_node("synthesize", self._synthesize_recommendations)
         
         # Define edges - sequential to avoid parallel state updates
@@ -44,41 +87,146 @@ class FinancialAdvisorOrchestrator:
         
         return workflow.compile()
     
-    def _run_budgeting_agent(self, state: OrchestratorState) -> Dict:
-        """Execute budgeting agent"""
-        try:
-            response = self.agents[AgentType.BUDGETING].analyze(state["user_profile"])
-            return {
-                "budgeting_response": response,
-                "agents_completed": ["budgeting"]
-            }
-        except Exception as e:
-            return {"errors": [f"Budgeting agent error: {str(e)}"]}
-    
-    def _run_investment_agent(self, state: OrchestratorState) -> Dict:
-        """Execute investment agent"""
+    def _agent_node(self, agent_type: AgentType) -> RunnableLambda:
+        """Graph node for one agent: invoke() runs it on a worker thread, ainvoke() on the event loop"""
+        return RunnableLambda(
+            functools.partial(self._run_agent, agent_type=agent_type),
+            afunc=functools.partial(self._arun_agent, agent_type=agent_type)
+        )
+    
+    def _slot_request(self, state: OrchestratorState):
+        return state.get("tenant", DEFAULT_TENANT), state.get("priority", Priority.API)
+    
+    @contextmanager
+    def _llm_slot(self, state: OrchestratorState, needed: bool = True):
+        """Hold a scheduler slot for the request's tenant while an agent calls the LLM"""
+        if not needed:
+            yield
+            return
+        with profile_phase("queue_wait"):
+            ticket = self.scheduler.acquire(*self._slot_request(state))
         try:
-            response = self.agents[AgentType.INVESTMENT].analyze(state["user_profile"])
-            return {
-                "investment_response": response,
-                "agents_completed": ["investment"]
-            }
-        except Exception as e:
-            return {"errors": [f"Investment agent error: {str(e)}"]}
-    
-    def _run_debt_management_agent(self, state: OrchestratorState) -> Dict:
-        """Execute debt management agent"""
+            yield
+        finally:
+            self.scheduler.release(ticket)
+    
+    @asynccontextmanager
+    async def _allm_slot(self, state: OrchestratorState, needed: bool = True):
+        """Async variant of _llm_slot(); waiting does not tie up a thread"""
+        if not needed:
+            yield
+            return
+        with profile_phase("queue_wait"):
+            ticket = await self.scheduler.aacquire(*self._slot_request(state))
         try:
-            response = self.agents[AgentType.DEBT_MANAGEMENT].analyze(state["user_profile"])
-            return {
-                "debt_response": response,
-                "agents_completed": ["debt_management"]
-            }
-        except Exception as e:
-            return {"errors": [f"Debt management agent error: {str(e)}"]}
+            yield
+        finally:
+            self.scheduler.release(ticket)
+    
+    def _run_agent(self, state: OrchestratorState, agent_type: AgentType) -> Dict:
+        """Execute a single agent"""
+        name, state_key, label = AGENT_NODES[agent_type]
+        with profile_phase(name, state.get("profiler")):
+            try:
+                agent = self.agents[agent_type]
+                with self._llm_slot(state, agent.requires_llm(state["user_profile"])):
+                    response = agent.analyze(state["user_profile"])
+                return {state_key: response, "agents_completed": [name]}
+            except Exception as e:
+                return {"errors": [f"{label} agent error: {str(e)}"]}
+    
+    async def _arun_agent(self, state: OrchestratorState, agent_type: AgentType) -> Dict:
+        """Execute a single agent with the async LLM client"""
+        name, state_key, label = AGENT_NODES[agent_type]
+        # cProfile would follow the event-loop thread across awaits, so time only
+        with profile_phase(name, state.get("profiler"), cpu=False):
+            try:
+                agent = self.agents[agent_type]
+                async with self._allm_slot(state, agent.requires_llm(state["user_profile"])):
+                    response = await agent.aanalyze(state["user_profile"])
+                return {state_key: response, "agents_completed": [name]}
+            except Exception as e:
+                return {"errors": [f"{label} agent error: {str(e)}"]}
+    
+    def _run_combined_agents(self, state: OrchestratorState) -> Dict:
+        """Execute all agents with one combined LLM call, falling back per agent"""
+        with profile_phase("combined", state.get("profiler")):
+            user_profile = state["user_profile"]
+            try:
+                with self._llm_slot(state, bool(self.combined_agent.llm_agent_types(user_profile))):
+                    sections = self.combined_agent.analyze_sections(user_profile)
+            except Exception as e:
+                logger.warning("Combined LLM call failed, falling back to per-agent calls: %s", e)
+                sections = {}
+            
+            fallbacks = {}
+            for agent_type in AGENT_NODES:
+                if agent_type in sections:
+                    continue
+                agent = self.agents[agent_type]
+                try:
+                    with profile_phase(AGENT_NODES[agent_type][0]), \
+                         self._llm_slot(state, agent.requires_llm(user_profile)):
+                        fallbacks[agent_type] = agent.analyze(user_profile)
+                except Exception as e:
+                    fallbacks[agent_type] = e
+            return self._combined_update(user_profile, sections, fallbacks)
+    
+    async def _arun_combined_agents(self, state: OrchestratorState) -> Dict:
+        """Async variant of _run_combined_agents()"""
+        with profile_phase("combined", state.get("profiler"), cpu=False):
+            user_profile = state["user_profile"]
+            try:
+                async with self._allm_slot(state, bool(self.combined_agent.llm_agent_types(user_profile))):
+                    sections = await self.combined_agent.aanalyze_sections(user_profile)
+            except Exception as e:
+                logger.warning("Combined LLM call failed, falling back to per-agent calls: %s", e)
+                sections = {}
+            
+            fallbacks = {}
+            for agent_type in AGENT_NODES:
+                if agent_type in sections:
+                    continue
+                agent = self.agents[agent_type]
+                try:
+                    with profile_phase(AGENT_NODES[agent_type][0]):
+                        async with self._allm_slot(state, agent.requires_llm(user_profile)):
+                            fallbacks[agent_type] = await agent.aanalyze(user_profile)
+                except Exception as e:
+                    fallbacks[agent_type] = e
+            return self._combined_update(user_profile, sections, fallbacks)
+    
+    def _combined_update(self, user_profile: UserProfile, sections: Dict[AgentType, str],
+                         fallbacks: Dict[AgentType, Union[AgentResponse, Exception]]) -> Dict:
+        """Build the state update from the combined sections and the per-agent fallbacks.
+        
+        ``fallbacks`` maps every agent without a section to its response, or to
+        the exception its own LLM call raised.
+        """
+        update = {"errors": [], "agents_completed": []}
+        for agent_type, (name, state_key, label) in AGENT_NODES.items():
+            if agent_type in sections:
+                try:
+                    response = self.agents[agent_type].build_response(user_profile, sections[agent_type])
+                except Exception as e:
+                    response = e
+            else:
+                response = fallbacks[agent_type]
+            
+            if isinstance(response, Exception):
+                update["errors"].append(f"{label} agent error: {str(response)}")
+            else:
+                update[state_key] = response
+                update["agents_completed"].append(name)
+        return update
     
     def _synthesize_recommendations(self, state: OrchestratorState) -> Dict:
         """Synthesize all agent recommendations into a final report"""
+        with profile_phase("report_formatting", state.get("profiler")):
+            return self._build_final_report(state)
+    
+    def _build_final_report(self, state: OrchestratorState) -> Dict:
+        """Format each agent section and the cross-agent priority actions"""
         report_sections = []
         
         # Budgeting Section
@@ -148,23 +296,67 @@ class FinancialAdvisorOrchestrator:
         
         return all_actions
     
-    def analyze(self, user_profile: UserProfile) -> str:
-        """Run the complete financial analysis"""
-        initial_state = {
+    def analyze(self, user_profile: UserProfile, profile: Optional[bool] = None,
+                tenant: str = DEFAULT_TENANT, priority: Priority = Priority.API) -> str:
+        """Run the complete financial analysis
+        
+        Agent LLM calls are admitted by the scheduler under ``tenant`` and
+        ``priority``. Pass ``profile=True`` to force profiling of this request or
+        ``False`` to skip it; by default the orchestrator's ProfilingConfig decides.
+        """
+        initial_state = self._initial_state(user_profile, profile, tenant, priority)
+        try:
+            result = self.graph.invoke(initial_state)
+        finally:
+            self._finish_profile(initial_state)
+        return self._format_result(result)
+    
+    async def aanalyze(self, user_profile: UserProfile, profile: Optional[bool] = None,
+                       tenant: str = DEFAULT_TENANT, priority: Priority = Priority.API) -> str:
+        """Async variant of analyze()
+        
+        Agent nodes await their scheduler slot on the event loop instead of
+        blocking a worker thread, and call the LLM through the async client.
+        """
+        initial_state = self._initial_state(user_profile, profile, tenant, priority)
+        try:
+            result = await self.graph.ainvoke(initial_state)
+        finally:
+            # Snapshotting and writing artifacts block, so keep them off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._finish_profile, initial_state)
+        return self._format_result(result)
+    
+    def _initial_state(self, user_profile: UserProfile, profile: Optional[bool],
+                       tenant: str, priority: Priority) -> Dict:
+        profiler = None
+        if should_profile(self.profiling, profile):
+            profiler = RequestProfiler(self.profiling).start()
+        
+        return {
             "user_profile": user_profile,
             "budgeting_response": None,
             "investment_response": None,
             "debt_response": None,
             "final_report": None,
             "errors": [],
-            "agents_completed": []
+            "agents_completed": [],
+            "profiler": profiler,
+            "tenant": tenant,
+            "priority": Priority(priority)
         }
-        
-        result = self.graph.invoke(initial_state)
-        
+    
+    def _finish_profile(self, initial_state: Dict) -> None:
+        """Write profiling artifacts; a profiling failure never fails the request"""
+        if initial_state["profiler"] is None:
+            return
+        try:
+            self.last_profile = initial_state["profiler"].finish()
+        except Exception:
+            logger.exception("Failed to write profile for request %s", initial_state["profiler"].request_id)
+    
+    def _format_result(self, result: Dict) -> str:
         if result.get("errors"):
             error_msg = "\n".join(result["errors"])
             return f"⚠️ Errors occurred:\n{error_msg}\n\n{result.get('final_report', '')}"
         
         return result.get("final_report", "Analysis completed but no report generated.")
-
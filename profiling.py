@@ -0,0 +1,232 @@
+import contextvars
+import cProfile
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import ProfilingConfig
+
+logger = logging.getLogger(__name__)
+
+# (profiler, phase path, cpu) of the innermost phase running in this context
+_current_phase: contextvars.ContextVar = contextvars.ContextVar("current_phase", default=None)
+_thread_state = threading.local()
+_NULL_PHASE = nullcontext()
+
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc_owned = True
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc() -> None:
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+def should_profile(config: ProfilingConfig, requested: Optional[bool] = None) -> bool:
+    """Decide whether a request is profiled: explicit request, then always-on, then sampling"""
+    if requested is not None:
+        return requested
+    if config.enabled:
+        return True
+    return config.sample_rate > 0 and random.random() < config.sample_rate
+
+
+def profile_phase(name: str, profiler: Optional["RequestProfiler"] = None, cpu: bool = True):
+    """Attribute the enclosed block to a named phase of the active request profiler.
+
+    Returns a shared no-op context manager when no request is being profiled.
+    Pass ``cpu=False`` for phases that span an ``await``; see RequestProfiler.
+    """
+    if profiler is None:
+        current = _current_phase.get()
+        if current is None:
+            return _NULL_PHASE
+        profiler = current[0]
+    return profiler.phase(name, cpu)
+
+
+class RequestProfiler:
+    """Collects cProfile and tracemalloc data for a single orchestrator request.
+
+    Phases may run on LangGraph worker threads, so each outermost phase on a
+    thread gets its own cProfile instance and the results are merged on finish.
+    Allocation deltas are process-wide and only approximate under concurrency.
+
+    cProfile is thread-scoped, so a phase held across an ``await`` would also
+    profile every other task on the event loop, and a second profiled request
+    on that loop would get no CPU data. Coroutine nodes therefore open their
+    phases with ``cpu=False``: they and every phase nested in them record wall
+    time and allocations only. Sync nodes that LangGraph runs in its executor
+    are still CPU profiled.
+    """
+
+    def __init__(self, config: ProfilingConfig, request_id: Optional[str] = None):
+        self.config = config
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        self._phases: Dict[Tuple[str, ...], List[float]] = {}
+        self._started_at: Optional[float] = None
+        self._tracing = False
+
+    def start(self) -> "RequestProfiler":
+        if self.config.memory:
+            _acquire_tracemalloc()
+            self._tracing = True
+        self._started_at = time.perf_counter()
+        return self
+
+    @contextmanager
+    def phase(self, name: str, cpu: bool = True):
+        current = _current_phase.get()
+        if current is not None and current[0] is self:
+            parent, cpu = current[1], cpu and current[2]
+        else:
+            parent = ()
+        path = parent + (name,)
+
+        profile = None
+        if cpu and self.config.cpu and not getattr(_thread_state, "profiling", False):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                _thread_state.profiling = True
+            except ValueError:
+                # Python 3.12+ allows a single active profiler per process
+                profile = None
+
+        token = _current_phase.set((self, path, cpu))
+        memory_before = tracemalloc.get_traced_memory()[0] if self._tracing else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            allocated = tracemalloc.get_traced_memory()[0] - memory_before if self._tracing else 0
+            _current_phase.reset(token)
+            if profile is not None:
+                profile.disable()
+                _thread_state.profiling = False
+            with self._lock:
+                record = self._phases.setdefault(path, [0.0, 0])
+                record[0] += elapsed
+                record[1] += allocated
+                if profile is not None:
+                    self._profiles.append(profile)
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop collection, write artifacts and return a summary"""
+        wall_time = time.perf_counter() - (self._started_at or time.perf_counter())
+        snapshot = None
+        if self._tracing:
+            snapshot = tracemalloc.take_snapshot()
+            _release_tracemalloc()
+            self._tracing = False
+
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        prefix = os.path.join(self.config.output_dir, self.request_id)
+        files = [self._write_phase_stacks(prefix + ".phases.folded", wall_time)]
+
+        if self._profiles:
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(prefix + ".pstats")
+            files.append(prefix + ".pstats")
+            files.append(self._write_function_stacks(prefix + ".folded", stats))
+
+        if snapshot is not None:
+            files.append(self._write_allocations(prefix + ".tracemalloc.txt", snapshot))
+
+        summary = {
+            "request_id": self.request_id,
+            "wall_time": wall_time,
+            "phases": {
+                "/".join(path): {"seconds": seconds, "allocated_bytes": int(allocated)}
+                for path, (seconds, allocated) in sorted(self._phases.items())
+            },
+            "files": files
+        }
+        logger.info("Profiled request %s in %.3fs; artifacts in %s",
+                    self.request_id, wall_time, self.config.output_dir)
+        return summary
+
+    def _write_phase_stacks(self, path: str, wall_time: float) -> str:
+        """Collapsed stacks of phase self-time in microseconds, rooted at the request"""
+        child_time: Dict[Tuple[str, ...], float] = {}
+        for phase_path, (seconds, _) in self._phases.items():
+            child_time[phase_path[:-1]] = child_time.get(phase_path[:-1], 0.0) + seconds
+
+        lines = []
+        request_self = max(0.0, wall_time - child_time.get((), 0.0))
+        if request_self > 0:
+            lines.append(f"request {int(request_self * 1e6)}")
+        for phase_path, (seconds, _) in sorted(self._phases.items()):
+            self_time = max(0.0, seconds - child_time.get(phase_path, 0.0))
+            if self_time > 0:
+                lines.append(f"{';'.join(('request',) + phase_path)} {int(self_time * 1e6)}")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _write_function_stacks(self, path: str, stats: pstats.Stats) -> str:
+        """Approximate collapsed stacks built by following each function's heaviest caller"""
+        entries = stats.stats
+
+        def label(func) -> str:
+            filename, line, name = func
+            return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+        lines = []
+        for func, (_, _, tottime, _, callers) in entries.items():
+            if tottime <= 0:
+                continue
+            stack = [label(func)]
+            seen = {func}
+            while callers and len(stack) < 64:
+                caller = max(callers, key=lambda c: callers[c][3])
+                if caller in seen or caller not in entries:
+                    break
+                seen.add(caller)
+                stack.append(label(caller))
+                callers = entries[caller][4]
+            lines.append(f"{';'.join(reversed(stack))} {int(tottime * 1e6)}")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _write_allocations(self, path: str, snapshot: tracemalloc.Snapshot, limit: int = 25) -> str:
+        lines = ["Net allocations by phase:"]
+        for phase_path, (_, allocated) in sorted(self._phases.items()):
+            lines.append(f"  {'/'.join(phase_path)}: {int(allocated) / 1024:.1f} KiB")
+        lines.append("")
+        lines.append(f"Top {limit} allocation sites:")
+        for stat in snapshot.statistics("lineno")[:limit]:
+            lines.append(f"  {stat}")
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, List, Optional
+
+from config import Priority, SchedulerConfig
+
+PRIORITY_ORDER = [Priority.INTERACTIVE, Priority.API, Priority.BATCH]
+
+
+class Ticket:
+    """A unit of agent work waiting for, or holding, a scheduler slot"""
+
+    def __init__(self, tenant: str, priority: Priority):
+        self.tenant = tenant
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted_at: Optional[float] = None
+        # Set for tickets awaited with aacquire(); resolved on the owning loop
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    @property
+    def queue_time(self) -> float:
+        return (self.granted_at or time.monotonic()) - self.enqueued_at
+
+
+class FairScheduler:
+    """Admits agent LLM calls by priority class, then weighted fair share between tenants.
+
+    Higher priority classes are always served first, but a class whose tenants
+    are all at their concurrency cap does not block lower classes, so batch
+    work soaks up whatever capacity interactive and API traffic leave free.
+    Admission never preempts a running call, so per-class caps (by default on
+    batch) keep slots free for interactive calls arriving while batch is busy.
+    Within a class, tenants are picked by virtual time (stride scheduling), so
+    a tenant with weight 2 gets twice the slots of a tenant with weight 1.
+    """
+
+    def __init__(self, config: Optional[SchedulerConfig] = None):
+        self.config = config or SchedulerConfig()
+        self._cond = threading.Condition()
+        self._queues: Dict[Priority, Dict[str, Deque[Ticket]]] = {p: {} for p in PRIORITY_ORDER}
+        self._running: Dict[str, int] = {}
+        self._running_total = 0
+        self._running_by_class: Dict[Priority, int] = {p: 0 for p in PRIORITY_ORDER}
+        self._virtual_time: Dict[str, float] = {}
+        self._virtual_clock = 0.0
+        self._queue_times: Dict[Priority, Deque[float]] = {
+            p: deque(maxlen=self.config.history_size) for p in PRIORITY_ORDER
+        }
+        # Most recently served tenants last; trimmed to tenant_history_limit
+        self._tenant_queue_times: "OrderedDict[str, Deque[float]]" = OrderedDict()
+
+    def _tenant_limit(self, tenant: str) -> int:
+        return self.config.tenant_limits.get(tenant, self.config.tenant_max_concurrency)
+
+    def _tenant_weight(self, tenant: str) -> float:
+        return self.config.tenant_weights.get(tenant, 1.0)
+
+    def _class_limit(self, priority: Priority) -> int:
+        return self.config.class_limits.get(priority, self.config.max_concurrency)
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        for priority in PRIORITY_ORDER:
+            if self._running_by_class[priority] >= self._class_limit(priority):
+                continue
+            eligible = [
+                tenant for tenant, queue in self._queues[priority].items()
+                if queue and self._running.get(tenant, 0) < self._tenant_limit(tenant)
+            ]
+            if eligible:
+                tenant = min(eligible, key=lambda t: max(self._virtual_time.get(t, 0.0), self._virtual_clock))
+                queue = self._queues[priority][tenant]
+                ticket = queue.popleft()
+                if not queue:
+                    del self._queues[priority][tenant]
+                return ticket
+        return None
+
+    def _forget_idle_tenant(self, tenant: str) -> None:
+        """Drop scheduling state of a tenant with nothing running or queued.
+
+        A returning tenant restarts at the current virtual clock, which is where
+        an idle tenant's virtual time would be lifted to anyway.
+        """
+        if self._running.get(tenant, 0) > 0:
+            return
+        if any(tenant in queues for queues in self._queues.values()):
+            return
+        self._running.pop(tenant, None)
+        self._virtual_time.pop(tenant, None)
+
+    def _record_queue_time(self, ticket: Ticket) -> None:
+        self._queue_times[ticket.priority].append(ticket.queue_time)
+        samples = self._tenant_queue_times.pop(ticket.tenant, None)
+        if samples is None:
+            samples = deque(maxlen=self.config.history_size)
+        self._tenant_queue_times[ticket.tenant] = samples
+        samples.append(ticket.queue_time)
+        while len(self._tenant_queue_times) > self.config.tenant_history_limit:
+            self._tenant_queue_times.popitem(last=False)
+
+    def _dispatch(self) -> None:
+        """Grant free slots to waiting tickets; caller holds the condition lock"""
+        granted = False
+        while self._running_total < self.config.max_concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            tenant = ticket.tenant
+            start = max(self._virtual_time.get(tenant, 0.0), self._virtual_clock)
+            self._virtual_clock = start
+            self._virtual_time[tenant] = start + 1.0 / self._tenant_weight(tenant)
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            self._running_total += 1
+            self._running_by_class[ticket.priority] += 1
+
+            ticket.granted_at = time.monotonic()
+            self._record_queue_time(ticket)
+            if ticket.future is not None:
+                ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+            else:
+                granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, tenant: str, priority: Priority = Priority.API) -> Ticket:
+        """Block until a slot is granted for this tenant and priority"""
+        ticket = Ticket(tenant, Priority(priority))
+        with self._cond:
+            self._queues[ticket.priority].setdefault(tenant, deque()).append(ticket)
+            self._dispatch()
+            while ticket.granted_at is None:
+                self._cond.wait()
+        return ticket
+
+    async def aacquire(self, tenant: str, priority: Priority = Priority.API) -> Ticket:
+        """Wait for a slot without blocking a thread.
+
+        Async callers only hold an event-loop future while queued, so a large
+        async batch cannot occupy executor threads that interactive work needs.
+        """
+        ticket = Ticket(tenant, Priority(priority))
+        ticket.loop = asyncio.get_running_loop()
+        ticket.future = ticket.loop.create_future()
+        with self._cond:
+            self._queues[ticket.priority].setdefault(tenant, deque()).append(ticket)
+            self._dispatch()
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            with self._cond:
+                granted = ticket.granted_at is not None
+                if not granted:
+                    queues = self._queues[ticket.priority]
+                    queues[tenant].remove(ticket)
+                    if not queues[tenant]:
+                        del queues[tenant]
+                    self._forget_idle_tenant(tenant)
+            if granted:
+                self.release(ticket)
+            raise
+        return ticket
+
+    def release(self, ticket: Ticket) -> None:
+        with self._cond:
+            self._running[ticket.tenant] -= 1
+            self._running_total -= 1
+            self._running_by_class[ticket.priority] -= 1
+            self._forget_idle_tenant(ticket.tenant)
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, tenant: str, priority: Priority = Priority.API):
+        ticket = self.acquire(tenant, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, tenant: str, priority: Priority = Priority.API):
+        ticket = await self.aacquire(tenant, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict:
+        """Current queue depths and running calls"""
+        with self._cond:
+            return {
+                "running": self._running_total,
+                "max_concurrency": self.config.max_concurrency,
+                "running_by_tenant": dict(self._running),
+                "running_by_priority": {p.value: n for p, n in self._running_by_class.items()},
+                "queued": {
+                    priority.value: sum(len(q) for q in queues.values())
+                    for priority, queues in self._queues.items()
+                }
+            }
+
+    def slo_report(self) -> Dict[str, Dict]:
+        """Queue-time percentiles and SLO violations per priority class and tenant"""
+        with self._cond:
+            by_priority = {p: list(samples) for p, samples in self._queue_times.items()}
+            by_tenant = {t: list(samples) for t, samples in self._tenant_queue_times.items()}
+
+        report = {"priorities": {}, "tenants": {}}
+        for priority, samples in by_priority.items():
+            slo = self.config.slo_seconds.get(priority)
+            violations = sum(1 for s in samples if slo is not None and s > slo)
+            report["priorities"][priority.value] = {
+                **_summarize(samples),
+                "slo_seconds": slo,
+                "violations": violations,
+                "violation_rate": violations / len(samples) if samples else 0.0
+            }
+        for tenant, samples in by_tenant.items():
+            report["tenants"][tenant] = _summarize(samples)
+        return report
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _percentile(sorted_samples: List[float], pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = max(0, int(round(pct / 100 * len(sorted_samples))) - 1)
+    return sorted_samples[min(index, len(sorted_samples) - 1)]
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": _percentile(ordered, 50),
+        "p95": _percentile(ordered, 95),
+        "max": ordered[-1] if ordered else 0.0
+    }
+
+
+_default_scheduler: Optional[FairScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Process-wide scheduler shared by every orchestrator"""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = FairScheduler(SchedulerConfig.from_env())
+        return _default_scheduler
@@ -1,12 +1,22 @@
 from abc import ABC, abstractmethod
-from langchain_openai import ChatOpenAI
+from contextlib import contextmanager
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from config import UserProfile, AgentResponse
+from profiling import profile_phase
+from .http_client import create_chat_model
+
+@contextmanager
+def llm_call(format_messages, *args):
+    """Render the prompt as prompt_construction, then time the caller's LLM request as llm_wait"""
+    with profile_phase("prompt_construction"):
+        messages = format_messages(*args)
+    with profile_phase("llm_wait"):
+        yield messages
 
 class BaseFinancialAgent(ABC):
     def __init__(self, api_key: str, model: str = "gpt-4"):
-        self.llm = ChatOpenAI(
+        self.llm = create_chat_model(
             api_key=api_key,
             model=model,
             temperature=0.3
@@ -19,12 +29,48 @@ class BaseFinancialAgent(ABC):
         pass
     
     @abstractmethod
+    def build_user_input(self, user_profile: UserProfile) -> str:
+        """Return the profile summary and task sent to the LLM"""
+        pass
+    
+    @abstractmethod
+    def build_response(self, user_profile: UserProfile, analysis: str) -> AgentResponse:
+        """Combine the LLM narrative with computed metrics and recommendations"""
+        pass
+    
+    def requires_llm(self, user_profile: UserProfile) -> bool:
+        """Whether analyzing this profile needs an LLM call"""
+        return True
+    
     def analyze(self, user_profile: UserProfile) -> AgentResponse:
         """Analyze user profile and return recommendations"""
-        pass
+        response = self._invoke_llm(self.build_user_input(user_profile))
+        return self.build_response(user_profile, response.content)
+    
+    async def aanalyze(self, user_profile: UserProfile) -> AgentResponse:
+        """Async variant of analyze(), using the shared async HTTP client"""
+        response = await self._ainvoke_llm(self.build_user_input(user_profile))
+        return self.build_response(user_profile, response.content)
     
     def _create_prompt_template(self) -> ChatPromptTemplate:
         return ChatPromptTemplate.from_messages([
             ("system", self.get_system_prompt()),
             ("human", "{user_input}\n\n{format_instructions}")
-        ])
\ No newline at end of file
+        ])
+    
+    def format_messages(self, user_input: str, include_format_instructions: bool = True):
+        """Render the chat messages sent to the LLM for this input"""
+        return self._create_prompt_template().format_messages(
+            user_input=user_input,
+            format_instructions=self.parser.get_format_instructions() if include_format_instructions else ""
+        )
+    
+    def _invoke_llm(self, user_input: str):
+        """Render the prompt for this agent and wait for the LLM response"""
+        with llm_call(self.format_messages, user_input) as messages:
+            return self.llm.invoke(messages)
+    
+    async def _ainvoke_llm(self, user_input: str):
+        """Async variant of _invoke_llm()"""
+        with llm_call(self.format_messages, user_input) as messages:
+            return await self.llm.ainvoke(messages)
@@ -21,10 +21,8 @@ Analyze the user's financial profile and provide:
 
 Be practical, encouraging, and provide specific dollar amounts where possible."""
 
-    def analyze(self, user_profile: UserProfile) -> AgentResponse:
-        prompt = self._create_prompt_template()
-        
-        user_input = f"""
+    def build_user_input(self, user_profile: UserProfile) -> str:
+        return f"""
         User Financial Profile:
         - Monthly Income: ${user_profile.monthly_income:,.2f}
         - Monthly Expenses: ${user_profile.monthly_expenses:,.2f}
@@ -35,13 +33,8 @@ Be practical, encouraging, and provide specific dollar amounts where possible.""
         
         Provide a comprehensive budgeting analysis and recommendations.
         """
-        
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "user_input": user_input,
-            "format_instructions": self.parser.get_format_instructions()
-        })
-        
+    
+    def build_response(self, user_profile: UserProfile, analysis: str) -> AgentResponse:
         # Parse response into structured format
         disposable_income = user_profile.monthly_income - user_profile.monthly_expenses
         savings_rate = (disposable_income / user_profile.monthly_income * 100) if user_profile.monthly_income > 0 else 0
@@ -55,7 +48,7 @@ Be practical, encouraging, and provide specific dollar amounts where possible.""
                 f"Build emergency fund of ${user_profile.monthly_expenses * 6:,.2f}",
                 "Track expenses using budgeting app for 30 days"
             ],
-            analysis=response.content,
+            analysis=analysis,
             key_metrics={
                 "current_savings_rate": f"{savings_rate:.1f}%",
                 "disposable_income": f"${disposable_income:,.2f}",
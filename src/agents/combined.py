@@ -0,0 +1,116 @@
+import re
+from typing import Dict, List
+from langchain.prompts import ChatPromptTemplate
+from config import AgentType, UserProfile
+from .base_agent import BaseFinancialAgent, llm_call
+
+
+SECTION_TITLES = {
+    AgentType.BUDGETING: "BUDGETING",
+    AgentType.INVESTMENT: "INVESTMENT",
+    AgentType.DEBT_MANAGEMENT: "DEBT_MANAGEMENT"
+}
+
+
+class CombinedAnalysisAgent:
+    """Produces the narrative analysis for several agents with a single LLM call"""
+
+    def __init__(self, agents: Dict[AgentType, BaseFinancialAgent]):
+        self.agents = agents
+        self.llm = agents[AgentType.BUDGETING].llm
+
+    def get_system_prompt(self, agent_types: List[AgentType]) -> str:
+        """Merge the specialist system prompts and describe the sectioned output"""
+        specialists = "\n\n".join(
+            f"### {SECTION_TITLES[agent_type]} SPECIALIST\n{self.agents[agent_type].get_system_prompt()}"
+            for agent_type in agent_types
+        )
+        markers = "\n".join(
+            f"<<<{SECTION_TITLES[agent_type]}>>>\n...\n<<<END {SECTION_TITLES[agent_type]}>>>"
+            for agent_type in agent_types
+        )
+        return f"""You are a panel of financial specialists reviewing the same client.
+Write a separate analysis for each specialist below, in that specialist's voice.
+
+{specialists}
+
+Wrap each specialist's analysis in its markers exactly as shown, with nothing outside the markers:
+{markers}"""
+
+    def build_user_input(self, user_profile: UserProfile, agent_types: List[AgentType]) -> str:
+        sections = ", ".join(SECTION_TITLES[agent_type] for agent_type in agent_types)
+        return f"""
+        User Financial Profile:
+        - Age: {user_profile.age}
+        - Monthly Income: ${user_profile.monthly_income:,.2f}
+        - Monthly Expenses: ${user_profile.monthly_expenses:,.2f}
+        - Current Savings: ${user_profile.savings:,.2f}
+        - Total Debt: ${user_profile.debt_amount:,.2f}
+        - Average Interest Rate: {user_profile.debt_interest_rate}%
+        - Risk Tolerance: {user_profile.risk_tolerance}
+        - Investment Experience: {user_profile.investment_experience}
+        - Financial Goals: {user_profile.financial_goals}
+
+        Provide the analysis for these sections: {sections}.
+        """
+
+    def llm_agent_types(self, user_profile: UserProfile) -> List[AgentType]:
+        """Agents whose analysis of this profile needs the LLM"""
+        return [
+            agent_type for agent_type in SECTION_TITLES
+            if agent_type in self.agents and self.agents[agent_type].requires_llm(user_profile)
+        ]
+
+    def format_messages(self, user_profile: UserProfile, agent_types: List[AgentType]):
+        """Render the combined chat messages for the given agents"""
+        return ChatPromptTemplate.from_messages([
+            ("system", self.get_system_prompt(agent_types)),
+            ("human", "{user_input}")
+        ]).format_messages(user_input=self.build_user_input(user_profile, agent_types))
+
+    def analyze_sections(self, user_profile: UserProfile) -> Dict[AgentType, str]:
+        """Return the parsed analysis for every agent that needs the LLM.
+
+        Agents missing from the result either do not need an LLM call for this
+        profile or produced a section that could not be parsed; callers should
+        fall back to the individual agent for those.
+        """
+        agent_types = self.llm_agent_types(user_profile)
+        if not agent_types:
+            return {}
+
+        with llm_call(self.format_messages, user_profile, agent_types) as messages:
+            response = self.llm.invoke(messages)
+
+        return self.parse_sections(response.content, agent_types)
+
+    async def aanalyze_sections(self, user_profile: UserProfile) -> Dict[AgentType, str]:
+        """Async variant of analyze_sections(), using the shared async HTTP client"""
+        agent_types = self.llm_agent_types(user_profile)
+        if not agent_types:
+            return {}
+
+        with llm_call(self.format_messages, user_profile, agent_types) as messages:
+            response = await self.llm.ainvoke(messages)
+
+        return self.parse_sections(response.content, agent_types)
+
+    @staticmethod
+    def parse_sections(content: str, agent_types: List[AgentType]) -> Dict[AgentType, str]:
+        """Extract each marked section; sections that are missing or empty are omitted.
+
+        A section without its end marker is accepted only when the next
+        section's start marker follows it. One that runs to the end of the
+        text may have been cut off by the token limit, so it is left out and
+        the caller falls back to the individual agent.
+        """
+        sections = {}
+        for agent_type in agent_types:
+            title = re.escape(SECTION_TITLES[agent_type])
+            match = re.search(rf"<<<{title}>>>(.*?)<<<END {title}>>>", content, re.DOTALL)
+            if match is None:
+                # Tolerate a missing end marker when another section starts next
+                match = re.search(rf"<<<{title}>>>(.*?)(?=<<<(?!END )[A-Z_]+>>>)", content, re.DOTALL)
+            if match and match.group(1).strip():
+                sections[agent_type] = match.group(1).strip()
+        return sections
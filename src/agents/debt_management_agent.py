@@ -22,10 +22,32 @@ Analyze the user's debt situation and provide:
 
 Be empathetic and encouraging while providing actionable debt elimination plans."""
 
+    def requires_llm(self, user_profile: UserProfile) -> bool:
+        return user_profile.debt_amount > 0
+    
     def analyze(self, user_profile: UserProfile) -> AgentResponse:
-        prompt = self._create_prompt_template()
+        if user_profile.debt_amount == 0:
+            return self._debt_free_response()
+        
+        return super().analyze(user_profile)
+    
+    async def aanalyze(self, user_profile: UserProfile) -> AgentResponse:
+        if user_profile.debt_amount == 0:
+            return self._debt_free_response()
         
-        user_input = f"""
+        return await super().aanalyze(user_profile)
+    
+    def _debt_free_response(self) -> AgentResponse:
+        return AgentResponse(
+            agent_type=AgentType.DEBT_MANAGEMENT,
+            recommendations=["No debt detected - focus on maintaining debt-free status"],
+            analysis="Congratulations! You're debt-free. Focus on building wealth.",
+            key_metrics={"debt_amount": "$0", "status": "debt_free"},
+            action_items=["Maintain emergency fund to avoid future debt"]
+        )
+    
+    def build_user_input(self, user_profile: UserProfile) -> str:
+        return f"""
         User Debt Profile:
         - Total Debt: ${user_profile.debt_amount:,.2f}
         - Average Interest Rate: {user_profile.debt_interest_rate}%
@@ -35,22 +57,8 @@ Be empathetic and encouraging while providing actionable debt elimination plans.
         
         Provide a comprehensive debt management strategy and repayment plan.
         """
-        
-        if user_profile.debt_amount == 0:
-            return AgentResponse(
-                agent_type=AgentType.DEBT_MANAGEMENT,
-                recommendations=["No debt detected - focus on maintaining debt-free status"],
-                analysis="Congratulations! You're debt-free. Focus on building wealth.",
-                key_metrics={"debt_amount": "$0", "status": "debt_free"},
-                action_items=["Maintain emergency fund to avoid future debt"]
-            )
-        
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "user_input": user_input,
-            "format_instructions": self.parser.get_format_instructions()
-        })
-        
+    
+    def build_response(self, user_profile: UserProfile, analysis: str) -> AgentResponse:
         # Calculate debt metrics
         disposable_income = user_profile.monthly_income - user_profile.monthly_expenses
         suggested_payment = min(disposable_income * 0.5, user_profile.debt_amount * 0.05)
@@ -69,7 +77,7 @@ Be empathetic and encouraging while providing actionable debt elimination plans.
                 "Consider balance transfer to 0% APR card if credit allows",
                 "Avoid new debt while paying off existing balances"
             ],
-            analysis=response.content,
+            analysis=analysis,
             key_metrics={
                 "total_debt": f"${user_profile.debt_amount:,.2f}",
                 "suggested_monthly_payment": f"${suggested_payment:,.2f}",
@@ -0,0 +1,298 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import httpx
+import openai
+from langchain_openai import ChatOpenAI
+from config import HttpClientConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+_lock = threading.Lock()
+_init_lock = threading.Lock()
+_config: Optional[HttpClientConfig] = None
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_counters = {"requests": 0, "in_flight": 0}
+# Chat models built by create_chat_model, rebound when the clients are replaced;
+# keyed by id() because pydantic models are unhashable
+_chat_models: "weakref.WeakValueDictionary[int, ChatOpenAI]" = weakref.WeakValueDictionary()
+
+
+def _request_started() -> None:
+    with _lock:
+        _counters["requests"] += 1
+        _counters["in_flight"] += 1
+
+
+def _request_finished() -> None:
+    with _lock:
+        _counters["in_flight"] -= 1
+
+
+class _CountingTransport(httpx.BaseTransport):
+    """Tracks requests waiting on the wrapped transport"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        _request_started()
+        try:
+            return self.transport.handle_request(request)
+        finally:
+            _request_finished()
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class _AsyncCountingTransport(httpx.AsyncBaseTransport):
+    """Tracks requests waiting on the wrapped async transport"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _request_started()
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            _request_finished()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def http_timeout(config: HttpClientConfig) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=config.connect_timeout,
+        read=config.read_timeout,
+        write=config.read_timeout,
+        pool=config.pool_timeout
+    )
+
+
+def _close_async_client(client: httpx.AsyncClient) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    try:
+        if loop is not None:
+            loop.create_task(client.aclose())
+        else:
+            asyncio.run(client.aclose())
+    except Exception as e:
+        # Connections opened on another, now closed, event loop cannot be closed cleanly
+        logger.debug("Failed to close async HTTP client: %s", e)
+
+
+def configure_http_clients(config: HttpClientConfig,
+                           transport: Optional[httpx.BaseTransport] = None,
+                           async_transport: Optional[httpx.AsyncBaseTransport] = None) -> None:
+    """Replace the process-wide HTTP clients used by every agent.
+
+    Chat models built earlier by ``create_chat_model`` are rebound to the new
+    clients before the previous ones are closed, so call this before serving
+    traffic: requests in flight on the old clients are interrupted. Custom
+    transports (e.g. ``httpx.MockTransport``) let tests run against a local
+    stub without network access.
+    """
+    global _config, _sync_client, _async_client
+    limits = httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry
+    )
+    http2 = config.http2 and importlib.util.find_spec("h2") is not None
+
+    sync_client = httpx.Client(
+        transport=_CountingTransport(transport or httpx.HTTPTransport(limits=limits, http2=http2)),
+        timeout=http_timeout(config)
+    )
+    async_client = httpx.AsyncClient(
+        transport=_AsyncCountingTransport(async_transport or httpx.AsyncHTTPTransport(limits=limits, http2=http2)),
+        timeout=http_timeout(config)
+    )
+    with _lock:
+        previous_sync, previous_async = _sync_client, _async_client
+        _config, _sync_client, _async_client = config, sync_client, async_client
+        models = list(_chat_models.values())
+
+    for llm in models:
+        _bind_clients(llm)
+    if previous_sync is not None:
+        previous_sync.close()
+    if previous_async is not None:
+        _close_async_client(previous_async)
+
+
+def get_http_config() -> HttpClientConfig:
+    if _config is None:
+        with _init_lock:
+            if _config is None:
+                configure_http_clients(HttpClientConfig.from_env())
+    return _config
+
+
+def get_http_client() -> httpx.Client:
+    """Shared synchronous client; created from the environment on first use"""
+    get_http_config()
+    return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Shared asynchronous client; created from the environment on first use"""
+    get_http_config()
+    return _async_client
+
+
+def _bind_clients(llm: ChatOpenAI) -> None:
+    """Point a chat model's OpenAI clients at the current shared HTTP clients"""
+    api_key = llm.openai_api_key
+    if hasattr(api_key, "get_secret_value"):
+        api_key = api_key.get_secret_value()
+    client_params = {
+        "api_key": api_key,
+        "organization": llm.openai_organization,
+        "base_url": llm.openai_api_base,
+        "timeout": llm.request_timeout,
+        "max_retries": llm.max_retries
+    }
+    llm.client = openai.OpenAI(http_client=_sync_client, **client_params).chat.completions
+    llm.async_client = openai.AsyncOpenAI(http_client=_async_client, **client_params).chat.completions
+
+
+def create_chat_model(api_key: str, model: str, temperature: float) -> ChatOpenAI:
+    """Build a ChatOpenAI whose sync and async calls go through the shared clients"""
+    config = get_http_config()
+    kwargs = {
+        "api_key": api_key,
+        "model": model,
+        "temperature": temperature,
+        "timeout": http_timeout(config)
+    }
+    if config.base_url:
+        kwargs["base_url"] = config.base_url
+
+    # The clients are attached after construction because the pinned
+    # langchain-openai hands a single http_client to both OpenAI clients
+    llm = ChatOpenAI(**kwargs)
+    with _lock:
+        _bind_clients(llm)
+        _chat_models[id(llm)] = llm
+    return llm
+
+
+def _warm_up_target(connections: Optional[int]) -> Tuple[int, str]:
+    config = get_http_config()
+    connections = config.warm_up_connections if connections is None else connections
+    return connections, (config.base_url or DEFAULT_BASE_URL).rstrip("/") + "/models"
+
+
+def _log_warm_up(pool: str, succeeded: int, connections: int, url: str, warmed: int) -> None:
+    logger.info("Warm-up (%s): %d/%d requests to %s succeeded, %d pooled connections",
+                pool, succeeded, connections, url, warmed)
+
+
+def warm_up(connections: Optional[int] = None) -> int:
+    """Open pooled connections (TCP + TLS) to the LLM endpoint ahead of the first request.
+
+    Sends ``connections`` concurrent requests through the sync client; any
+    HTTP response, including 401, warms the connection it used. Returns the
+    number of connections now in the pool, which is lower than the request
+    count when HTTP/2 multiplexes them over one connection.
+
+    Only the sync pool used by ``analyze()`` is warmed. Async connections are
+    tied to the event loop that opened them, so warm the pool behind
+    ``aanalyze()`` with ``awarm_up()`` on the loop that serves requests.
+    """
+    connections, url = _warm_up_target(connections)
+    if connections <= 0:
+        return 0
+
+    client = get_http_client()
+
+    def ping(_) -> bool:
+        try:
+            client.get(url)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("HTTP warm-up request to %s failed: %s", url, e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        succeeded = sum(executor.map(ping, range(connections)))
+    warmed = _pool_usage(client)["connections"]
+    _log_warm_up("sync", succeeded, connections, url, warmed)
+    return warmed
+
+
+async def awarm_up(connections: Optional[int] = None) -> int:
+    """Async counterpart of warm_up() for the shared async client's pool.
+
+    Await it on the event loop that will run ``aanalyze()``, e.g. in a
+    server startup hook; connections opened on any other loop cannot be reused.
+    """
+    connections, url = _warm_up_target(connections)
+    if connections <= 0:
+        return 0
+
+    client = get_async_http_client()
+
+    async def ping() -> bool:
+        try:
+            await client.get(url)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("HTTP warm-up request to %s failed: %s", url, e)
+            return False
+
+    succeeded = sum(await asyncio.gather(*(ping() for _ in range(connections))))
+    warmed = _pool_usage(client)["connections"]
+    _log_warm_up("async", succeeded, connections, url, warmed)
+    return warmed
+
+
+def _pool_usage(client: Any) -> Dict[str, int]:
+    # httpx does not expose pool state publicly; read httpcore's pool if present
+    transport = getattr(getattr(client, "_transport", None), "transport", None)
+    connections = list(getattr(getattr(transport, "_pool", None), "connections", []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Request counters and connection pool utilization of the shared clients"""
+    with _lock:
+        counters = dict(_counters)
+        config, sync_client, async_client = _config, _sync_client, _async_client
+    return {
+        **counters,
+        "max_connections": config.max_connections if config else 0,
+        "sync_pool": _pool_usage(sync_client),
+        "async_pool": _pool_usage(async_client)
+    }
+
+
+def close_http_clients() -> None:
+    """Close both shared clients, e.g. at process shutdown.
+
+    Chat models created earlier keep the closed clients; call
+    ``configure_http_clients`` instead to swap clients while agents are in use.
+    """
+    global _config, _sync_client, _async_client
+    with _lock:
+        sync_client, async_client = _sync_client, _async_client
+        _config, _sync_client, _async_client = None, None, None
+    if sync_client is not None:
+        sync_client.close()
+    if async_client is not None:
+        _close_async_client(async_client)
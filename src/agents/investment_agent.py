@@ -21,10 +21,8 @@ Analyze the user's profile and provide:
 
 Consider the user's investment experience level and explain concepts clearly."""
 
-    def analyze(self, user_profile: UserProfile) -> AgentResponse:
-        prompt = self._create_prompt_template()
-        
-        user_input = f"""
+    def build_user_input(self, user_profile: UserProfile) -> str:
+        return f"""
         User Investment Profile:
         - Age: {user_profile.age}
         - Monthly Income: ${user_profile.monthly_income:,.2f}
@@ -35,13 +33,8 @@ Consider the user's investment experience level and explain concepts clearly."""
         
         Provide a comprehensive investment strategy and portfolio recommendations.
         """
-        
-        chain = prompt | self.llm
-        response = chain.invoke({
-            "user_input": user_input,
-            "format_instructions": self.parser.get_format_instructions()
-        })
-        
+    
+    def build_response(self, user_profile: UserProfile, analysis: str) -> AgentResponse:
         # Calculate asset allocation based on age and risk tolerance
         stock_allocation = self._calculate_stock_allocation(user_profile)
         bond_allocation = 100 - stock_allocation
@@ -55,7 +48,7 @@ Consider the user's investment experience level and explain concepts clearly."""
                 "Consider Roth IRA for tax-free growth",
                 "Rebalance portfolio quarterly"
             ],
-            analysis=response.content,
+            analysis=analysis,
             key_metrics={
                 "recommended_stock_allocation": f"{stock_allocation}%",
                 "recommended_bond_allocation": f"{bond_allocation}%",
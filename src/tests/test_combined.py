@@ -0,0 +1,83 @@
+import pytest
+from unittest.mock import Mock, patch
+from ...config import AgentType, UserProfile, ProfilingConfig
+from ..agents.combined import CombinedAnalysisAgent
+from ..agents.investment_agent import InvestmentAgent
+from ...orchestrator import FinancialAdvisorOrchestrator
+
+
+@pytest.fixture
+def sample_profile():
+    return UserProfile(
+        monthly_income=5000,
+        monthly_expenses=3500,
+        debt_amount=15000,
+        debt_interest_rate=18.5,
+        savings=10000,
+        age=30
+    )
+
+@pytest.fixture
+def orchestrator():
+    return FinancialAdvisorOrchestrator("test-api-key", profiling=ProfilingConfig(), combined=True)
+
+ALL_AGENTS = [AgentType.BUDGETING, AgentType.INVESTMENT, AgentType.DEBT_MANAGEMENT]
+
+class TestParseSections:
+    def test_all_sections(self):
+        content = (
+            "<<<BUDGETING>>>\nBudget text\n<<<END BUDGETING>>>\n"
+            "<<<INVESTMENT>>>\nInvest text\n<<<END INVESTMENT>>>\n"
+            "<<<DEBT_MANAGEMENT>>>\nDebt text\n<<<END DEBT_MANAGEMENT>>>"
+        )
+        sections = CombinedAnalysisAgent.parse_sections(content, ALL_AGENTS)
+        assert sections == {
+            AgentType.BUDGETING: "Budget text",
+            AgentType.INVESTMENT: "Invest text",
+            AgentType.DEBT_MANAGEMENT: "Debt text"
+        }
+    
+    def test_missing_end_marker(self):
+        content = (
+            "<<<BUDGETING>>>\nBudget text\n"
+            "<<<INVESTMENT>>>\nInvest text\n<<<END INVESTMENT>>>"
+        )
+        sections = CombinedAnalysisAgent.parse_sections(content, ALL_AGENTS)
+        assert sections[AgentType.BUDGETING] == "Budget text"
+        assert sections[AgentType.INVESTMENT] == "Invest text"
+        assert AgentType.DEBT_MANAGEMENT not in sections
+    
+    def test_truncated_final_section_is_omitted(self):
+        content = (
+            "<<<BUDGETING>>>\nBudget text\n<<<END BUDGETING>>>\n"
+            "<<<INVESTMENT>>>\nInvest text cut off mid-"
+        )
+        sections = CombinedAnalysisAgent.parse_sections(content, ALL_AGENTS)
+        assert sections == {AgentType.BUDGETING: "Budget text"}
+    
+    def test_empty_section_is_omitted(self):
+        content = "<<<BUDGETING>>>\n\n<<<END BUDGETING>>>"
+        assert CombinedAnalysisAgent.parse_sections(content, ALL_AGENTS) == {}
+
+class TestCombinedOrchestrator:
+    def test_single_call_with_fallback(self, orchestrator, sample_profile):
+        content = (
+            "<<<BUDGETING>>>\nBudget text\n<<<END BUDGETING>>>\n"
+            "<<<DEBT_MANAGEMENT>>>\nDebt text\n<<<END DEBT_MANAGEMENT>>>"
+        )
+        llm = orchestrator.combined_agent.llm
+        
+        with patch.object(type(llm), 'invoke', return_value=Mock(content=content)) as combined_invoke, \
+             patch.object(InvestmentAgent, '_invoke_llm', return_value=Mock(content="Fallback")) as fallback:
+            result = orchestrator.graph.invoke({
+                "user_profile": sample_profile,
+                "errors": [],
+                "agents_completed": [],
+                "profiler": None
+            })
+        
+        assert combined_invoke.call_count == 1
+        assert fallback.call_count == 1
+        assert result["budgeting_response"].analysis == "Budget text"
+        assert result["investment_response"].analysis == "Fallback"
+        assert result["debt_response"].analysis == "Debt text"
@@ -0,0 +1,90 @@
+import httpx
+import pytest
+from ...config import AgentType, HttpClientConfig, UserProfile
+from ..agents import http_client
+from ..agents.factory import AgentFactory
+
+
+@pytest.fixture
+def stub_endpoint():
+    """Route the shared clients to an in-process stub instead of the network"""
+    requests = []
+    
+    def handler(request):
+        requests.append(request)
+        if request.url.path.endswith("/chat/completions"):
+            return httpx.Response(200, json={
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "gpt-4",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Stub analysis"}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+            })
+        return httpx.Response(401, json={"error": "stub"})
+    
+    http_client.configure_http_clients(
+        HttpClientConfig(base_url="http://stub.local/v1", warm_up_connections=2),
+        transport=httpx.MockTransport(handler),
+        async_transport=httpx.MockTransport(handler)
+    )
+    yield requests
+    # Rebind anything created during the test to real clients instead of closing them
+    http_client.configure_http_clients(HttpClientConfig.from_env())
+
+class TestSharedHttpClient:
+    def test_clients_are_shared(self, stub_endpoint):
+        assert http_client.get_http_client() is http_client.get_http_client()
+        assert http_client.get_async_http_client() is http_client.get_async_http_client()
+    
+    def test_agents_use_shared_client(self, stub_endpoint):
+        agents = AgentFactory.create_all_agents("test-api-key")
+        clients = {id(agent.llm.client._client._client) for agent in agents.values()}
+        assert clients == {id(http_client.get_http_client())}
+    
+    def test_timeouts_from_config(self, stub_endpoint):
+        timeout = http_client.get_http_client().timeout
+        assert timeout.connect == 5.0
+        assert timeout.read == 120.0
+    
+    def test_reconfigure_rebinds_existing_agents(self, stub_endpoint):
+        agent = AgentFactory.create_agent(AgentType.BUDGETING, "test-api-key")
+        old_client = http_client.get_http_client()
+        
+        http_client.configure_http_clients(HttpClientConfig(base_url="http://stub.local/v1"))
+        
+        assert old_client.is_closed
+        assert agent.llm.client._client._client is http_client.get_http_client()
+        assert agent.llm.async_client._client._client is http_client.get_async_http_client()
+    
+    @pytest.mark.asyncio
+    async def test_async_analyze_uses_shared_async_client(self, stub_endpoint):
+        agent = AgentFactory.create_agent(AgentType.BUDGETING, "test-api-key")
+        profile = UserProfile(monthly_income=5000, monthly_expenses=3000, age=30)
+        
+        response = await agent.aanalyze(profile)
+        
+        assert response.analysis == "Stub analysis"
+        assert str(stub_endpoint[-1].url) == "http://stub.local/v1/chat/completions"
+    
+    def test_warm_up_hits_stub(self, stub_endpoint):
+        before = http_client.pool_stats()["requests"]
+        warmed = http_client.warm_up()
+        assert len(stub_endpoint) == 2
+        assert str(stub_endpoint[0].url) == "http://stub.local/v1/models"
+        
+        stats = http_client.pool_stats()
+        # The stub transport has no connection pool, so nothing is reported as warmed
+        assert warmed == stats["sync_pool"]["connections"] == 0
+        assert stats["requests"] == before + 2
+        assert stats["in_flight"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_async_warm_up_hits_stub(self, stub_endpoint):
+        before = http_client.pool_stats()["requests"]
+        warmed = await http_client.awarm_up()
+        assert len(stub_endpoint) == 2
+        assert all(str(request.url) == "http://stub.local/v1/models" for request in stub_endpoint)
+        
+        stats = http_client.pool_stats()
+        assert warmed == stats["async_pool"]["connections"] == 0
+        assert stats["requests"] == before + 2
+        assert stats["in_flight"] == 0
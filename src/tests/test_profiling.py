@@ -0,0 +1,72 @@
+import os
+import pytest
+from unittest.mock import patch
+from ...config import ProfilingConfig, UserProfile
+from ...profiling import RequestProfiler, profile_phase, should_profile
+from ..agents.budgeting_agent import BudgetingAgent
+from ..agents.investment_agent import InvestmentAgent
+from ..agents.debt_management_agent import DebtManagementAgent
+from ...orchestrator import FinancialAdvisorOrchestrator
+
+
+@pytest.fixture
+def profiling_config(tmp_path):
+    return ProfilingConfig(cpu=True, memory=True, output_dir=str(tmp_path))
+
+class TestShouldProfile:
+    def test_disabled_by_default(self):
+        assert not should_profile(ProfilingConfig())
+    
+    def test_explicit_request_wins(self):
+        assert should_profile(ProfilingConfig(), requested=True)
+        assert not should_profile(ProfilingConfig(enabled=True), requested=False)
+    
+    def test_full_sample_rate(self):
+        assert should_profile(ProfilingConfig(sample_rate=1.0))
+
+class TestRequestProfiler:
+    def test_phase_is_noop_without_profiler(self):
+        with profile_phase("llm_wait") as value:
+            assert value is None
+    
+    def test_nested_phases_and_artifacts(self, profiling_config):
+        profiler = RequestProfiler(profiling_config, request_id="req").start()
+        
+        with profile_phase("budgeting", profiler):
+            with profile_phase("llm_wait"):
+                [str(i) for i in range(1000)]
+        
+        summary = profiler.finish()
+        assert "budgeting" in summary["phases"]
+        assert "budgeting/llm_wait" in summary["phases"]
+        for path in summary["files"]:
+            assert os.path.exists(path)
+        
+        with open(os.path.join(profiling_config.output_dir, "req.phases.folded")) as f:
+            assert "request;budgeting;llm_wait" in f.read()
+    
+    def test_cpu_disabled_phase_covers_nested_phases(self, profiling_config):
+        profiler = RequestProfiler(profiling_config, request_id="req").start()
+        
+        with profile_phase("budgeting", profiler, cpu=False):
+            with profile_phase("llm_wait"):
+                [str(i) for i in range(1000)]
+        
+        summary = profiler.finish()
+        assert "budgeting/llm_wait" in summary["phases"]
+        assert not any(path.endswith(".pstats") for path in summary["files"])
+        assert os.path.exists(os.path.join(profiling_config.output_dir, "req.tracemalloc.txt"))
+
+class TestOrchestratorProfiling:
+    def test_profile_write_failure_does_not_fail_request(self, profiling_config):
+        orchestrator = FinancialAdvisorOrchestrator("test-api-key", profiling=profiling_config)
+        profile = UserProfile(monthly_income=5000, monthly_expenses=3000, age=30)
+        
+        with patch.object(BudgetingAgent, 'analyze'), \
+             patch.object(InvestmentAgent, 'analyze'), \
+             patch.object(DebtManagementAgent, 'analyze'), \
+             patch.object(RequestProfiler, 'finish', side_effect=OSError("read-only file system")):
+            result = orchestrator.analyze(profile, profile=True)
+        
+        assert isinstance(result, str)
+        assert orchestrator.last_profile is None
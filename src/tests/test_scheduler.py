@@ -0,0 +1,267 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, patch
+from ...config import AgentResponse, AgentType, Priority, ProfilingConfig, SchedulerConfig, UserProfile
+from ...scheduler import FairScheduler
+from ..agents.budgeting_agent import BudgetingAgent
+from ..agents.investment_agent import InvestmentAgent
+from ..agents.debt_management_agent import DebtManagementAgent
+from ...orchestrator import FinancialAdvisorOrchestrator
+
+
+@pytest.fixture
+def sample_profile():
+    return UserProfile(
+        monthly_income=5000,
+        monthly_expenses=3500,
+        debt_amount=15000,
+        debt_interest_rate=18.5,
+        savings=10000,
+        age=30
+    )
+
+class StubScheduler:
+    """Grants every request immediately and records what it was asked for"""
+    
+    def __init__(self):
+        self.acquired = []
+        self.released = 0
+    
+    def acquire(self, tenant, priority):
+        self.acquired.append((tenant, priority))
+        return object()
+    
+    async def aacquire(self, tenant, priority):
+        return self.acquire(tenant, priority)
+    
+    def release(self, ticket):
+        self.released += 1
+
+def stub_response(agent_type):
+    return AgentResponse(
+        agent_type=agent_type,
+        recommendations=["Stub recommendation"],
+        analysis="Stub analysis",
+        key_metrics={"stub_metric": 1},
+        action_items=["Stub action"]
+    )
+
+@contextmanager
+def stub_async_agents():
+    """Replace each agent's aanalyze() with an AsyncMock returning a real AgentResponse"""
+    with patch.object(BudgetingAgent, 'aanalyze', new_callable=AsyncMock,
+                      return_value=stub_response(AgentType.BUDGETING)), \
+         patch.object(InvestmentAgent, 'aanalyze', new_callable=AsyncMock,
+                      return_value=stub_response(AgentType.INVESTMENT)), \
+         patch.object(DebtManagementAgent, 'aanalyze', new_callable=AsyncMock,
+                      return_value=stub_response(AgentType.DEBT_MANAGEMENT)):
+        yield
+
+async def wait_until(condition, timeout=10):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def run_jobs(scheduler, jobs, hold=0.01):
+    """Queue all jobs behind a blocker and return the order they were admitted in"""
+    order = []
+    blocker = scheduler.acquire("blocker", Priority.INTERACTIVE)
+    
+    def job(tenant, priority):
+        with scheduler.slot(tenant, priority):
+            order.append(tenant)
+            time.sleep(hold)
+    
+    threads = [threading.Thread(target=job, args=args) for args in jobs]
+    for thread in threads:
+        thread.start()
+    while sum(scheduler.stats()["queued"].values()) < len(jobs):
+        time.sleep(0.001)
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join()
+    return order
+
+class TestFairScheduler:
+    def test_priority_order(self):
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=1))
+        order = run_jobs(scheduler, [
+            ("batch", Priority.BATCH),
+            ("api", Priority.API),
+            ("ui", Priority.INTERACTIVE)
+        ])
+        assert order == ["ui", "api", "batch"]
+    
+    def test_weighted_fair_share(self):
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=1, tenant_weights={"a": 2.0}))
+        order = run_jobs(scheduler, [("a", Priority.API)] * 6 + [("b", Priority.API)] * 6)
+        assert order[:6].count("a") == 4
+    
+    def test_tenant_cap_lets_lower_class_run(self):
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=2, tenant_limits={"ui": 1}))
+        running = scheduler.acquire("ui", Priority.INTERACTIVE)
+        
+        # "ui" is at its cap, so batch work takes the spare slot
+        batch = scheduler.acquire("nightly", Priority.BATCH)
+        assert scheduler.stats()["running"] == 2
+        scheduler.release(batch)
+        scheduler.release(running)
+    
+    @pytest.mark.asyncio
+    async def test_interactive_admitted_while_batch_saturated(self):
+        scheduler = FairScheduler(SchedulerConfig(
+            max_concurrency=4, tenant_max_concurrency=10, class_limits={Priority.BATCH: 3}
+        ))
+        batch = [asyncio.create_task(scheduler.aacquire("nightly", Priority.BATCH)) for _ in range(10)]
+        await wait_until(lambda: scheduler.stats()["queued"]["batch"] == 7)
+        assert scheduler.stats()["running_by_priority"]["batch"] == 3
+        
+        # Batch is at its class cap, so the reserved slot is still free
+        ticket = await asyncio.wait_for(scheduler.aacquire("ui", Priority.INTERACTIVE), timeout=1)
+        assert scheduler.stats()["running"] == 4
+        
+        scheduler.release(ticket)
+        for task in batch:
+            task.cancel()
+        await asyncio.gather(*batch, return_exceptions=True)
+        for task in batch:
+            if not task.cancelled():
+                scheduler.release(task.result())
+        assert scheduler.stats()["running"] == 0
+    
+    def test_slo_report(self):
+        scheduler = FairScheduler(SchedulerConfig(slo_seconds={Priority.INTERACTIVE: 0.0}))
+        with scheduler.slot("ui", Priority.INTERACTIVE):
+            pass
+        
+        report = scheduler.slo_report()
+        interactive = report["priorities"]["interactive"]
+        assert interactive["count"] == 1
+        assert interactive["slo_seconds"] == 0.0
+        assert report["tenants"]["ui"]["count"] == 1
+        assert report["priorities"]["batch"]["count"] == 0
+    
+    def test_idle_tenant_state_is_dropped(self):
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=1))
+        run_jobs(scheduler, [("tenant-%d" % i, Priority.API) for i in range(5)], hold=0)
+        
+        assert scheduler._running == {}
+        assert scheduler._virtual_time == {}
+        assert all(queues == {} for queues in scheduler._queues.values())
+    
+    def test_tenant_history_is_bounded(self):
+        scheduler = FairScheduler(SchedulerConfig(tenant_history_limit=2))
+        for tenant in ("a", "b", "c"):
+            with scheduler.slot(tenant):
+                pass
+        assert set(scheduler.slo_report()["tenants"]) == {"b", "c"}
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_async_waiter_leaves_queue(self):
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=1))
+        blocker = scheduler.acquire("blocker", Priority.INTERACTIVE)
+        waiter = asyncio.create_task(scheduler.aacquire("nightly", Priority.BATCH))
+        await wait_until(lambda: scheduler.stats()["queued"]["batch"] == 1)
+        
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release(blocker)
+        
+        assert scheduler.stats()["queued"]["batch"] == 0
+        assert scheduler.stats()["running"] == 0
+    
+    def test_config_from_env(self, monkeypatch):
+        monkeypatch.setenv("ADVISOR_SCHEDULER_TENANT_LIMITS", json.dumps({"acme": 4}))
+        monkeypatch.setenv("ADVISOR_SCHEDULER_TENANT_WEIGHTS", json.dumps({"acme": 2.0}))
+        monkeypatch.setenv("ADVISOR_SCHEDULER_SLO_SECONDS", json.dumps({"interactive": 0.5}))
+        monkeypatch.setenv("ADVISOR_SCHEDULER_CLASS_LIMITS", json.dumps({"api": 5}))
+        
+        config = SchedulerConfig.from_env()
+        assert config.tenant_limits == {"acme": 4}
+        assert config.tenant_weights == {"acme": 2.0}
+        assert config.slo_seconds[Priority.INTERACTIVE] == 0.5
+        assert config.slo_seconds[Priority.BATCH] == 300.0
+        assert config.class_limits == {Priority.BATCH: 4, Priority.API: 5}
+
+class TestOrchestratorScheduling:
+    def test_analyze_submits_tenant_and_priority(self, sample_profile):
+        scheduler = StubScheduler()
+        orchestrator = FinancialAdvisorOrchestrator("test-api-key", profiling=ProfilingConfig(), scheduler=scheduler)
+        
+        with patch.object(BudgetingAgent, 'analyze'), \
+             patch.object(InvestmentAgent, 'analyze'), \
+             patch.object(DebtManagementAgent, 'analyze'):
+            orchestrator.analyze(sample_profile, tenant="acme", priority=Priority.BATCH)
+        
+        assert scheduler.acquired == [("acme", Priority.BATCH)] * 3
+        assert scheduler.released == 3
+    
+    @pytest.mark.asyncio
+    async def test_aanalyze_submits_tenant_and_priority(self, sample_profile):
+        scheduler = StubScheduler()
+        orchestrator = FinancialAdvisorOrchestrator("test-api-key", profiling=ProfilingConfig(), scheduler=scheduler)
+        
+        with stub_async_agents():
+            result = await orchestrator.aanalyze(sample_profile, tenant="ui", priority=Priority.INTERACTIVE)
+        
+        assert "Stub recommendation" in result
+        assert scheduler.acquired == [("ui", Priority.INTERACTIVE)] * 3
+        assert scheduler.released == 3
+    
+    def test_slot_released_when_agent_raises(self, sample_profile):
+        scheduler = StubScheduler()
+        orchestrator = FinancialAdvisorOrchestrator("test-api-key", profiling=ProfilingConfig(), scheduler=scheduler)
+        
+        with patch.object(BudgetingAgent, 'analyze', side_effect=RuntimeError("LLM down")), \
+             patch.object(InvestmentAgent, 'analyze'), \
+             patch.object(DebtManagementAgent, 'analyze'):
+            result = orchestrator.analyze(sample_profile)
+        
+        assert "Budgeting agent error: LLM down" in result
+        assert scheduler.released == len(scheduler.acquired) == 3
+    
+    def test_queue_wait_phase_is_profiled(self, sample_profile, tmp_path):
+        orchestrator = FinancialAdvisorOrchestrator(
+            "test-api-key",
+            profiling=ProfilingConfig(cpu=False, output_dir=str(tmp_path)),
+            scheduler=StubScheduler()
+        )
+        
+        with patch.object(BudgetingAgent, 'analyze'), \
+             patch.object(InvestmentAgent, 'analyze'), \
+             patch.object(DebtManagementAgent, 'analyze'):
+            orchestrator.analyze(sample_profile, profile=True)
+        
+        assert "budgeting/queue_wait" in orchestrator.last_profile["phases"]
+    
+    @pytest.mark.asyncio
+    async def test_interactive_admitted_behind_large_async_batch(self, sample_profile):
+        # More queued batch requests than the default executor has threads
+        batch_size = 64
+        scheduler = FairScheduler(SchedulerConfig(max_concurrency=1, tenant_max_concurrency=batch_size))
+        orchestrator = FinancialAdvisorOrchestrator("test-api-key", profiling=ProfilingConfig(), scheduler=scheduler)
+        
+        with stub_async_agents():
+            blocker = scheduler.acquire("blocker", Priority.INTERACTIVE)
+            batch = [
+                asyncio.create_task(orchestrator.aanalyze(sample_profile, tenant="nightly", priority=Priority.BATCH))
+                for _ in range(batch_size)
+            ]
+            await wait_until(lambda: scheduler.stats()["queued"]["batch"] == batch_size)
+            
+            interactive = asyncio.create_task(
+                orchestrator.aanalyze(sample_profile, tenant="ui", priority=Priority.INTERACTIVE)
+            )
+            await wait_until(lambda: scheduler.stats()["queued"]["interactive"] == 1)
+            scheduler.release(blocker)
+            
+            assert "Stub recommendation" in await asyncio.wait_for(interactive, timeout=10)
+            assert scheduler.stats()["queued"]["batch"] > 0
+            await asyncio.gather(*batch)